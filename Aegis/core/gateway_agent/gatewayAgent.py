@@ -1,7 +1,13 @@
 import uuid 
 from Aegis.core.gateway_agent.gatewayAgent_shcemas import RegisteredResource
-from typing import List, Dict, Any, Optional, Callable
+from typing import List, Dict, Set, Tuple, Any, Optional, Callable
+from datetime import datetime
+from cachetools import TTLCache
+from operator import attrgetter
+import asyncio
+import copy
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -12,17 +18,46 @@ class GatewayAgent:
     Implements resource registration, validation, testing, and intelligent retrieval.
     """
 
+    # resources falling below this success rate are deactivated (not removed)
+    DEACTIVATION_SUCCESS_RATE = 50.0
+    DEACTIVATION_MIN_SAMPLES = 5
+
+    SEARCH_CACHE_SIZE = 500
+    SEARCH_CACHE_TTL = 5.0
+
+    # metric updates are queued and applied in batches
+    UPDATE_FLUSH_INTERVAL = 0.05
+    UPDATE_BATCH_SIZE = 64
+
+    # weight of the newest outcome in a resource's success EWMA
+    EWMA_ALPHA = 0.3
 
     def __init__(self, name: str, endpoint: str="http://localhost:8000", enable_testing: bool = True):
         self.name = name 
-        self.id = str()
+        self.id = uuid.uuid4().hex
         self.endpoint = endpoint
         self.enable_testing = enable_testing
 
 
         # resource registry 
         self.registry: Dict[str, RegisteredResource] = {}
-        self.capability_index: Dict[str, List[str]] = {}
+        self.capability_index: Dict[str, Set[str]] = {}
+
+        # capability -> single bit, so matching is one AND per resource
+        self._cap_bits: Dict[str, int] = {}
+
+        # bounds over active resources, used to reject impossible searches in O(1)
+        self._active_cap_mask = 0
+        self._max_resource_caps = 0
+        self._search_bounds_stale = False
+
+        # matching resource ids keyed by the sorted requirement tuple; ranked on read,
+        # so only registration and deactivation (the match sets) invalidate it
+        self._search_cache = TTLCache(maxsize=self.SEARCH_CACHE_SIZE, ttl=self.SEARCH_CACHE_TTL)
+
+        # (resource_id, success, response_time) waiting for the next flush
+        self._pending_updates: asyncio.Queue = asyncio.Queue()
+        self._flush_task: Optional[asyncio.Task] = None
 
         # filters and guardrails
         self.security_filters: List[Callable] = []
@@ -36,23 +71,157 @@ class GatewayAgent:
             "average_search_time": 0.0
         }
 
-        logger.info(f"Gateway Agent '{self.name}' initialized at {endpoint}")
+        logger.info("Gateway Agent '%s' initialized at %s", self.name, endpoint)
 
 
     async def register_resource(self, resource_info: Dict[str, Any])-> str:
-        pass 
+        """
+        Register a resource and index it by capability.
+
+        Returns:
+            The resource id
+        """
+        resource_id = resource_info.get("id") or self._generate_resource_id()
+
+        # validated before touching the indexes, so a rejected re-registration keeps the old entry intact
+        resource = RegisteredResource(
+            id=resource_id,
+            description=resource_info.get("description", ""),
+            capabilities=resource_info.get("capabilities", []),
+            endpoint=resource_info.get("endpoint", ""),
+            api_shcema=resource_info.get("api_schema", {}),
+            manifest=resource_info.get("manifest", {}),
+            owner=resource_info.get("owner", ""),
+            max_concurrency=resource_info.get("max_concurrency", 10),
+            registration_time=datetime.now().isoformat()
+        )
+
+        previous = self.registry.get(resource_id)
+        if previous is not None:
+            self._unindex_resource(previous)
+            self._search_bounds_stale = True
+
+        mask = 0
+        for cap in resource.capabilities:
+            self.capability_index.setdefault(cap, set()).add(resource_id)
+            bit = self._cap_bits.setdefault(cap, 1 << len(self._cap_bits))
+            mask |= bit
+        resource.mask = mask
+
+        self.registry[resource_id] = resource
+        self._store_score(resource)
+        self._active_cap_mask |= mask
+        self._max_resource_caps = max(self._max_resource_caps, len(resource.capabilities))
+        self.gateway_metrics["total_resources"] = len(self.registry)
+        self._search_cache.clear()
+
+        logger.info("Registered resource %s with capabilities %s", resource_id, resource.capabilities)
+        return resource_id
     
     async def search_resources(self, requirements: List[str])-> List[Dict[str, Any]]:
-        pass
+        """
+        Find active resources that provide every required capability,
+        ranked by relevance.
+        """
+        started = time.perf_counter()
+        self.gateway_metrics["total_queries"] += 1
 
-    def _generate_resource_id():
-        pass 
+        key = tuple(sorted(requirements))
+        matched = self._search_cache.get(key)
+        if matched is None:
+            matched = self._match_resources(requirements)
+            self._search_cache[key] = matched
+
+        # ranked on read so load and outcome updates apply immediately; result
+        # dicts are built per call, so callers can't alter the cache or the registry
+        ranked = sorted((self.registry[resource_id] for resource_id in matched), key=attrgetter("score"), reverse=True)
+        results = [self._to_search_result(resource, resource.score) for resource in ranked]
+        if results:
+            self.gateway_metrics["successful_matches"] += 1
+
+        self._update_avg_search_time(time.perf_counter() - started)
+        return results
+
+    def _match_resources(self, requirements: List[str]) -> Tuple[str, ...]:
+        """Ids of the active resources covering every requirement."""
+        if self._search_bounds_stale:
+            self._refresh_search_bounds()
+
+        # no single resource has that many capabilities
+        if len(set(requirements)) > self._max_resource_caps:
+            return ()
+
+        req_mask = 0
+        for cap in requirements:
+            bit = self._cap_bits.get(cap)
+            if bit is None:
+                # nobody ever registered this capability
+                return ()
+            req_mask |= bit
+
+        # some capability is only offered by inactive resources
+        if req_mask & ~self._active_cap_mask:
+            return ()
+
+        # only walk the smallest capability bucket, the mask check does the rest
+        if requirements:
+            candidate_ids = min((self.capability_index[cap] for cap in requirements), key=len)
+            candidates = (self.registry[rid] for rid in candidate_ids)
+        else:
+            candidates = self.registry.values()
+
+        return tuple(
+            resource.id for resource in candidates
+            if resource.is_active and (resource.mask & req_mask) == req_mask
+        )
+
+    def _generate_resource_id(self) -> str:
+        return uuid.uuid4().hex
+
+    def _store_score(self, resource: RegisteredResource):
+        # ranking score is computed here, on update, never per query
+        resource.score = self._calculate_relevance_score(resource)
+
+    def _refresh_search_bounds(self):
+        active = [resource for resource in self.registry.values() if resource.is_active]
+        self._active_cap_mask = 0
+        for resource in active:
+            self._active_cap_mask |= resource.mask
+        self._max_resource_caps = max((len(resource.capabilities) for resource in active), default=0)
+        self._search_bounds_stale = False
+
+    def _unindex_resource(self, resource: RegisteredResource):
+        for cap in resource.capabilities:
+            ids = self.capability_index.get(cap)
+            if ids is not None:
+                ids.discard(resource.id)
+
+    def _to_search_result(self, resource: RegisteredResource, score: float) -> Dict[str, Any]:
+        return {
+            "id": resource.id,
+            "name": resource.manifest.get("name", resource.id),
+            "description": resource.description,
+            "capabilities": list(resource.capabilities),
+            "endpoint": resource.endpoint,
+            "manifest": copy.deepcopy(resource.manifest),
+            "performance_metrics": {
+                "success_rate": resource.success_rate,
+                "avg_response_time": resource.avg_response_time,
+                "usage_count": resource.usage_count
+            },
+            "relevance_score": score
+        }
 
     def _capability_fimilarity():
         pass 
 
-    def _calculate_relevance_score():
-        pass
+    def _calculate_relevance_score(self, resource: RegisteredResource) -> float:
+        """
+        Score for a resource that already covers the requirements: recent
+        success, spare capacity and low latency rank first.
+        """
+        headroom = max(0.0, 1.0 - resource.load / resource.max_concurrency)
+        return resource.ewma * headroom / (1.0 + resource.avg_response_time)
 
 
     async def _security_check():
@@ -69,11 +238,83 @@ class GatewayAgent:
         pass
 
 
-    def _update_avg_search_time():
-        pass 
+    def _update_avg_search_time(self, elapsed: float):
+        # running mean, O(1) and no history kept
+        n = self.gateway_metrics["total_queries"]
+        avg = self.gateway_metrics["average_search_time"]
+        self.gateway_metrics["average_search_time"] = avg + (elapsed - avg) / n
 
-    async def update_resource_metrics():
-        pass 
+    async def update_resource_metrics(self, resource_id: str, success: bool, response_time: float):
+        """
+        Record the outcome of one invocation of a resource.
+
+        The update is queued and applied with the next batch, either after
+        UPDATE_FLUSH_INTERVAL or as soon as UPDATE_BATCH_SIZE updates are pending.
+        Call flush_updates() to apply everything immediately.
+        """
+        self._pending_updates.put_nowait((resource_id, success, response_time))
+
+        if self._pending_updates.qsize() >= self.UPDATE_BATCH_SIZE:
+            self._apply_pending_updates()
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_updates())
+
+    def mark_in_flight(self, resource_id: str):
+        """
+        Count an invocation that has started; the matching
+        update_resource_metrics() (or release_in_flight()) call releases it.
+        """
+        resource = self.registry.get(resource_id)
+        if resource is None:
+            return
+        resource.load += 1
+        self._store_score(resource)
+
+    def release_in_flight(self, resource_id: str):
+        """Release an invocation that ended without an outcome (e.g. cancelled)."""
+        resource = self.registry.get(resource_id)
+        if resource is None or resource.load == 0:
+            return
+        resource.load -= 1
+        self._store_score(resource)
+
+    async def flush_updates(self):
+        """Apply every queued metric update now."""
+        self._apply_pending_updates()
+
+    async def _flush_updates(self):
+        while not self._pending_updates.empty():
+            await asyncio.sleep(self.UPDATE_FLUSH_INTERVAL)
+            self._apply_pending_updates()
+
+    def _apply_pending_updates(self):
+        while not self._pending_updates.empty():
+            resource_id, success, response_time = self._pending_updates.get_nowait()
+            resource = self.registry.get(resource_id)
+            if resource is None:
+                logger.warning("Metrics update for unknown resource: %s", resource_id)
+                continue
+            self._record_outcome(resource, success, response_time)
+
+    def _record_outcome(self, resource: RegisteredResource, success: bool, response_time: float):
+        """Fold one outcome into the running metrics; keep failing resources out of search."""
+        resource.usage_count += 1
+        n = resource.usage_count
+        resource.success_rate += ((100.0 if success else 0.0) - resource.success_rate) / n
+        resource.avg_response_time += (response_time - resource.avg_response_time) / n
+        resource.performance_metrics["last_response_time"] = response_time
+        resource.ewma = self.EWMA_ALPHA * (1.0 if success else 0.0) + (1 - self.EWMA_ALPHA) * resource.ewma
+        resource.load = max(0, resource.load - 1)
+        self._store_score(resource)
+
+        if (resource.is_active
+                and n >= self.DEACTIVATION_MIN_SAMPLES
+                and resource.success_rate < self.DEACTIVATION_SUCCESS_RATE):
+            resource.is_active = False
+            self._search_bounds_stale = True
+            # cached match sets may include it
+            self._search_cache.clear()
+            logger.warning("Resource %s deactivated (success rate %.1f%%)", resource.id, resource.success_rate)
 
     def get_resource_info():
         pass 
@@ -1,7 +1,13 @@
 from dataclasses import dataclass,field 
 from typing import List, Dict, Any, Optional
+import sys
 
-@dataclass 
+
+def _intern_caps(caps: List[str]) -> List[str]:
+    # the same few capability names repeat across resources and tasks; share one str object per name
+    return [sys.intern(cap) for cap in caps]
+
+@dataclass(slots=True)
 class RegisteredResource:
     # -- tool essentials information
     id: str 
@@ -14,7 +20,7 @@ class RegisteredResource:
 
     # -- tool registration information
     registration_time: str = ""
-    last_tested: Optional[str]
+    last_tested: Optional[str] = None
 
     # -- tool testing information
     test_results: Dict[str, Any] = field(default_factory=dict)
@@ -24,3 +30,22 @@ class RegisteredResource:
     avg_response_time: float = 0.0
     is_active: bool = True
 
+    # -- live ranking: in-flight invocations and recent-success EWMA
+    load: int = 0
+    max_concurrency: int = 10
+    ewma: float = 1.0
+    # ranking score, kept current by the gateway on every update
+    score: float = 1.0
+
+    # -- capability bitmask, assigned by the gateway on registration
+    mask: int = 0
+
+    def __post_init__(self):
+        if not self.id:
+            raise ValueError("RegisteredResource requires a non-empty id")
+        if isinstance(self.capabilities, str):
+            raise ValueError("RegisteredResource capabilities must be a list of names, not a string")
+        if self.max_concurrency < 1:
+            raise ValueError("RegisteredResource max_concurrency must be at least 1")
+        self.capabilities = _intern_caps(self.capabilities)
+
@@ -1,39 +1,93 @@
-from principalAgent_schemas import OperationalMode, Task, Resource
-from typing import List, Dict, Any, Optional
+from Aegis.core.principal_agent.principalAgent_schemas import OperationalMode, Task, Resource
+from Aegis.core.protocol.protocol_clients import A2AProtocolClient
+from cachetools import TTLCache
+from typing import AsyncIterator, List, Dict, Set, Tuple, Any, Optional
+from collections import defaultdict, deque
+from dataclasses import asdict
+from datetime import datetime
+from heapq import heapify, heappush
+from operator import itemgetter
+import asyncio
+import itertools
+import re
+import time
 import uuid
 import logging
 
 
 logger = logging.getLogger(__name__)
 
+
+# Rule based planning for the mvp: keyword -> (description, requirements, context key)
+_PLAN_RULES = {
+    "calculate": ("Perform arithmetic calculation", ["arithmetic", "math"], "input"),
+    "search": ("Search for information", ["search", "information_retrieval"], "query"),
+    "analyze": ("Analyze data", ["data_analysis", "statistics"], "data"),
+}
+# one pass over the request finds every keyword
+_PLAN_RE = re.compile("|".join(re.escape(keyword) for keyword in _PLAN_RULES), re.IGNORECASE)
+
 class PrincipalAgent:
     """
     Principal Agent acts as the central orchestrator in the DAWN framework.
     It plans tasks, requests resources from Gateway Agents, and orchestrates execution.
     """
 
-    def __init__(self, name: str = "principal_agent", mode: OperationalMode = OperationalMode):
+    DISCOVERY_CACHE_SIZE = 500
+    DISCOVERY_CACHE_TTL = 60.0
+
+    # local picks expire so the gateways' ranking (load, failures) is consulted again
+    LOCAL_POOL_SIZE = 500
+    LOCAL_POOL_TTL = 30.0
+
+    def __init__(self, name: str = "principal_agent", mode: OperationalMode = OperationalMode.NO_LLM,
+                 a2a_protocol: Optional[A2AProtocolClient] = None, max_concurrency: int = 32,
+                 history_limit: int = 1000):
         self.name = name
-        self.id = str(uuid.uuid4())
+        self.id = uuid.uuid4().hex
+        # task / resource ids only need to be unique within this agent
+        self._id_prefix = f"{self.id}:"
+        self._id_counter = itertools.count()
         self.mode = mode
 
-        # Connected Gateway Agents
+        # A2A client used to delegate tasks; without one execution is simulated
+        self.a2a_protocol = a2a_protocol
+
+        # Connected Gateway Agents, also by id to report resource usage back
         self.gateway_agents = []
+        self._gateways_by_id = {}
+
+        # Local resource pool (cache) and its capability -> resource ids index
+        self.local_resources = TTLCache(maxsize=self.LOCAL_POOL_SIZE, ttl=self.LOCAL_POOL_TTL)
+        self._cap_index: Dict[str, Set[str]] = defaultdict(set)
 
-        # Local resource pool (cache)
-        self.local_resources = {}
+        # gateway search results keyed by (gateway id, frozenset of requirements)
+        self._discovery_cache = TTLCache(maxsize=self.DISCOVERY_CACHE_SIZE, ttl=self.DISCOVERY_CACHE_TTL)
 
         # Task queue and execution history
         # might change based on a2a 
+        # task_queue is a heap of (-len(requirements), seq, task): most constrained first, FIFO on ties
         self.task_queue = []
-        self.execution_history = []
+        self._task_seq = itertools.count()
+        # histories keep only the most recent history_limit entries
+        self.execution_history = deque(maxlen=history_limit)
+
+        # caps how many subtasks run at once (backpressure for large plans)
+        self._task_sem = asyncio.Semaphore(max_concurrency)
+
+        # artificial processing time for simulated execution (demos/tests); off by default
+        self._simulation_delay = 0.0
+
+        # tasks waiting to go out in the next batch to their endpoint
+        self._pending_invocations: Dict[str, List[Tuple[Task, asyncio.Future]]] = {}
+        self._flush_tasks: Set[asyncio.Task] = set()
 
 
         # Context management
         self.context = {
-            "conversation_history": [],
+            "conversation_history": deque(maxlen=history_limit),
             "user_preferences": {},
-            "task_history": [],
+            "task_history": deque(maxlen=history_limit),
             "memory_bank": {}
         }
 
@@ -46,81 +100,409 @@ class PrincipalAgent:
 
         self.current_strategy = "react"
         
-        logger.info(f"Principal Agent '{self.name}' initialized in {mode.value} mode")
+        logger.info("Principal Agent '%s' initialized in %s mode", self.name, mode.value)
 
 
     def connect_gateway(self, gateway_agent):
         """Connect to a Gateway Agent"""
         self.gateway_agents.append(gateway_agent)
-        logger.info(f"Connected to Gateway Agent: {gateway_agent.name}")
+        self._gateways_by_id[gateway_agent.id] = gateway_agent
+        logger.info("Connected to Gateway Agent: %s", gateway_agent.name)
     
     async def plan_task(self, user_request: str) -> List[Task]:
         """
         Create a plan to execute the user's request.
         Decomposes the request into manageable subtasks.
         """
-        logger.info(f"Planning task: {user_request}")
+        logger.info("Planning task: %s", user_request)
 
         tasks = []
 
         # Make simple rule based for mvp testing 
-        if "calculate" in user_request.lower():
-            tasks.append(Task(
-                id=str(uuid.uuid4()),
-                description="Perform arithmetic calculation",
-                requirements=["arithmetic", "math"],
-                context={"input": user_request}
-            ))
-
-        if "search" in user_request.lower():
-            tasks.append(Task(
-                id=str(uuid.uuid4()),
-                description="Search for information",
-                requirements=["search", "information_retrieval"],
-                context={"query": user_request}
-            ))
-
-        if "analyze" in user_request.lower():
-            tasks.append(Task(
-                id=str(uuid.uuid4()),
-                description="Analyze data",
-                requirements=["data_analysis", "statistics"],
-                context={"data": user_request}
-            ))
+        matched = {m.group(0).lower() for m in _PLAN_RE.finditer(user_request)}
+        for keyword, (description, requirements, context_key) in _PLAN_RULES.items():
+            if keyword in matched:
+                tasks.append(Task(
+                    id=self._new_id(),
+                    description=description,
+                    requirements=list(requirements),
+                    context={context_key: user_request}
+                ))
 
          # Default task if no specific pattern matched
         if not tasks:
             tasks.append(Task(
-                id=str(uuid.uuid4()),
+                id=self._new_id(),
                 description=user_request,
                 requirements=["general"],
                 context={"original_request": user_request}
             ))
         
-        self.task_queue.extend(tasks)
+        for task in tasks:
+            heappush(self.task_queue, (-len(task.requirements), next(self._task_seq), task))
         return tasks
 
+    def _new_id(self) -> str:
+        return f"{self._id_prefix}{next(self._id_counter)}"
+
+    def _take_queued_tasks(self, planned: List[Task]) -> List[Task]:
+        """
+        Remove the given planned tasks from the queue and return them,
+        hardest-to-place first. Tasks queued by other plan_task calls stay queued.
+        """
+        planned_ids = {task.id for task in planned}
+        mine = []
+        rest = []
+        for entry in self.task_queue:
+            (mine if entry[-1].id in planned_ids else rest).append(entry)
+        heapify(rest)
+        self.task_queue = rest
+        # seq is unique, so entries never compare tasks
+        mine.sort()
+        return [entry[-1] for entry in mine]
+
     async def request_resources(self, task: Task) -> List[Resource]:
-        pass
+        """
+        Ask every connected Gateway Agent for resources matching the task requirements.
+        Gateways are queried concurrently; no sleep(0) yields (see execute_task).
+        """
+        logger.debug("Requesting resources for task: %s", task.description)
 
-    def _filter_resources(self, resources: List[Resource], requirements: List[str]) -> List[Resource]:
-        pass 
+        requirements_key = frozenset(task.requirements)
 
-    async def execute_task(self, user_request: str) -> Dict[str, Any]:
-        pass 
+        async def _query(gateway) -> List[Resource]:
+            key = (gateway.id, requirements_key)
+            cached = self._discovery_cache.get(key)
+            if cached is not None:
+                return cached
+            try:
+                found = await gateway.search_resources(task.requirements) or []
+            except Exception as e:
+                # one failing gateway must not hide the others' resources
+                logger.error("Gateway %s failed to search resources: %s", gateway.name, e)
+                return []
+            # cache built Resource objects so hits skip the conversion
+            resources = []
+            for res in found:
+                try:
+                    resources.append(Resource(
+                        id=res.get("id") or self._new_id(),
+                        name=res.get("name", ""),
+                        capabilities=res.get("capabilities", []),
+                        endpoint=res.get("endpoint", ""),
+                        manifest=res.get("manifest", {}),
+                        gateway_id=gateway.id,
+                        performance_metrics=res.get("performance_metrics")
+                    ))
+                except (AttributeError, TypeError, ValueError) as e:
+                    # one malformed entry must not fail the whole task
+                    logger.warning("Skipping malformed resource from gateway %s: %s", gateway.name, e)
+            self._discovery_cache[key] = resources
+            return resources
+
+        per_gateway = await asyncio.gather(*[_query(gateway) for gateway in self.gateway_agents])
+
+        return [resource for resources in per_gateway for resource in resources]
+
+    async def acquire_resource(self, task: Task) -> Optional[Resource]:
+        """
+        Pick a resource for the task: a local one from the capability index
+        if any covers a requirement, otherwise the best match from the
+        gateways (cached discovery results first). Gateway picks are kept
+        in the local pool for LOCAL_POOL_TTL, or until an invocation fails.
+        """
+        req_set = frozenset(task.requirements)
+        ids = set().union(*(self._cap_index.get(req, ()) for req in req_set))
+        # expired picks linger in the index until they are looked up
+        local = [self.local_resources[rid] for rid in ids if rid in self.local_resources]
+        if len(local) < len(ids):
+            for req in req_set:
+                self._cap_index.get(req, set()).intersection_update(self.local_resources.keys())
+        if local:
+            # best coverage of the requirements wins
+            return max(local, key=lambda r: len(req_set & r.caps_set))
+
+        candidates = self._filter_resources(await self.request_resources(task), task.requirements)
+        if not candidates:
+            return None
+        self._cache_local_resource(candidates[0])
+        return candidates[0]
+
+    def invalidate_discovery_cache(self):
+        """
+        Forget cached gateway search results and local picks
+        (e.g. after the resource pool changed).
+        """
+        self._discovery_cache.clear()
+        self.local_resources.clear()
+        self._cap_index.clear()
 
     def _filter_resources(self, resources: List[Resource], requirements: List[str]) -> List[Resource]:
-        pass
+        """
+        Keep resources that cover at least one requirement, best coverage first.
+        """
+        req_set = frozenset(requirements)
+        # one intersection per resource; zero coverage is filtered out
+        scored = [(score, resource) for resource in resources if (score := len(req_set & resource.caps_set))]
+        # reverse sort is stable, so gateway order breaks ties
+        scored.sort(key=itemgetter(0), reverse=True)
+        return [resource for _, resource in scored]
 
     async def execute_task(self, user_request: str) -> Dict[str, Any]:
-        pass 
-    
-    # Before looking for resources we need to check the local resources 
-    def _find_local_resource(self, requirements: List[str]) -> Optional[Resource]:
-        pass 
+        """
+        Plan the user's request, acquire a resource for every subtask and
+        delegate them. Subtasks are dispatched concurrently.
+
+        Orchestration paths never call asyncio.sleep(0) to "force" scheduling:
+        real I/O awaits are the yield points, and fairness under large
+        fan-outs comes from the task semaphore (see set_max_concurrency).
+        """
+        tasks = await self._start_request(user_request)
+
+        # every subtask resolves its resource and runs concurrently;
+        # results are reported in plan order regardless of completion order
+        results = [None] * len(tasks)
+        async for index, result in self._stream_tasks(tasks):
+            results[index] = result
+
+        return self._record_execution(user_request, tasks, results)
+
+    async def execute_task_stream(self, user_request: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Like execute_task, but yields each subtask result as soon as it
+        completes. The execution is recorded once the stream is exhausted;
+        closing the stream early cancels the subtasks still running.
+        """
+        tasks = await self._start_request(user_request)
+
+        results = [None] * len(tasks)
+        async for index, result in self._stream_tasks(tasks):
+            results[index] = result
+            yield result
+
+        self._record_execution(user_request, tasks, results)
+
+    async def _start_request(self, user_request: str) -> List[Task]:
+        logger.info("Executing request: %s", user_request)
+        self.context["conversation_history"].append({"role": "user", "content": user_request})
+
+        return self._take_queued_tasks(await self.plan_task(user_request))
+
+    async def _stream_tasks(self, tasks: List[Task]) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """Run every task concurrently, yielding (index, result entry) in completion order."""
+        futures = {asyncio.ensure_future(self._run_one(task)): index for index, task in enumerate(tasks)}
+        pending = set(futures)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    index = futures[future]
+                    exc = future.exception()
+                    yield index, self._fail_task(tasks[index], exc) if exc else future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def execute_batch(self, user_requests: List[str]) -> List[Dict[str, Any]]:
+        """
+        Execute several requests at once; preferred entry point for high throughput.
+
+        All requests are planned first and their subtasks dispatched through a
+        single gather, so the event loop stays saturated across requests.
+        Returns one result per request, in the same shape and order as
+        execute_task would.
+        """
+        logger.info("Executing batch of %d requests", len(user_requests))
+        self.context["conversation_history"].extend(
+            {"role": "user", "content": user_request} for user_request in user_requests
+        )
+
+        plans = [await self.plan_task(user_request) for user_request in user_requests]
+        owner = {task.id: index for index, plan in enumerate(plans) for task in plan}
+        tasks = self._take_queued_tasks([task for plan in plans for task in plan])
+
+        outcomes = await asyncio.gather(*[self._run_one(task) for task in tasks], return_exceptions=True)
+        results = self._collect_results(tasks, outcomes)
+
+        grouped_tasks = [[] for _ in user_requests]
+        grouped_results = [[] for _ in user_requests]
+        for task, result in zip(tasks, results):
+            index = owner[task.id]
+            grouped_tasks[index].append(task)
+            grouped_results[index].append(result)
+
+        return [
+            self._record_execution(user_request, request_tasks, request_results)
+            for user_request, request_tasks, request_results in zip(user_requests, grouped_tasks, grouped_results)
+        ]
+
+    def _collect_results(self, tasks: List[Task], outcomes: List[Any]) -> List[Dict[str, Any]]:
+        """Turn gathered outcomes into per-task result entries, marking exceptions as failures."""
+        return [
+            self._fail_task(task, outcome) if isinstance(outcome, Exception) else outcome
+            for task, outcome in zip(tasks, outcomes)
+        ]
+
+    def _fail_task(self, task: Task, exc: BaseException) -> Dict[str, Any]:
+        logger.error("Task %s failed: %s", task.id, exc)
+        task.status = "failed"
+        task.result = {"error": str(exc)}
+        return self._task_result(task)
+
+    def _record_execution(self, user_request: str, tasks: List[Task], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        execution_record = {
+            "request": user_request,
+            # Task objects and a raw timestamp; formatted in get_execution_history
+            "tasks": tasks,
+            "results": results,
+            "timestamp": time.time()
+        }
+        self.execution_history.append(execution_record)
+        self.context["task_history"].extend(task.id for task in tasks)
+
+        return {
+            "request": user_request,
+            "success": all(task.status == "completed" for task in tasks),
+            "results": results
+        }
+
+    async def _run_one(self, task: Task) -> Dict[str, Any]:
+        """
+        Acquire a resource for one task and execute it, at most
+        max_concurrency at a time.
+        Sets task.status / task.result and returns the per-task result entry.
+        """
+        async with self._task_sem:
+            return await self._run_task(task)
+
+    async def _run_task(self, task: Task) -> Dict[str, Any]:
+        resource = await self.acquire_resource(task)
+        if resource is None:
+            logger.warning("No suitable resource found for task: %s", task.description)
+            task.status = "failed"
+            task.result = {"error": "No suitable resource found"}
+            return self._task_result(task)
+
+        task.assigned_resource = resource.id
+        task.status = "on-going"
+
+        try:
+            outcome = await self._execute_reported(task, resource)
+        except Exception:
+            self._evict_resource(resource)
+            raise
+        task.result = outcome
+        task.status = "failed" if isinstance(outcome, dict) and "error" in outcome else "completed"
+        if task.status == "failed":
+            self._evict_resource(resource)
+        return self._task_result(task)
+
+    async def _execute_reported(self, task: Task, resource: Resource) -> Dict[str, Any]:
+        """
+        Execute the task, telling the resource's gateway when the invocation
+        starts and how it ended; the gateway ranks resources on load and outcomes.
+        """
+        gateway = self._gateways_by_id.get(resource.gateway_id)
+        if gateway is None:
+            return await self._execute_with_resource(task, resource)
+
+        gateway.mark_in_flight(resource.id)
+        started = time.perf_counter()
+        try:
+            outcome = await self._execute_with_resource(task, resource)
+        except asyncio.CancelledError:
+            gateway.release_in_flight(resource.id)
+            raise
+        except Exception:
+            await gateway.update_resource_metrics(resource.id, False, time.perf_counter() - started)
+            raise
+
+        success = not (isinstance(outcome, dict) and "error" in outcome)
+        await gateway.update_resource_metrics(resource.id, success, time.perf_counter() - started)
+        return outcome
+
+    def _task_result(self, task: Task) -> Dict[str, Any]:
+        return {
+            "task_id": task.id,
+            "description": task.description,
+            "status": task.status,
+            "resource": task.assigned_resource,
+            "result": task.result
+        }
+
+    def _evict_resource(self, resource: Resource):
+        """
+        Drop a resource whose invocation failed from the local pool and from
+        cached searches of its gateway, so the next task asks the gateway again.
+        """
+        if self.local_resources.pop(resource.id, None) is not None:
+            for cap in resource.capabilities:
+                self._cap_index.get(cap, set()).discard(resource.id)
+        for key in [key for key in self._discovery_cache.keys() if key[0] == resource.gateway_id]:
+            self._discovery_cache.pop(key, None)
+
+    def _cache_local_resource(self, resource: Resource):
+        self.local_resources[resource.id] = resource
+        for cap in resource.capabilities:
+            self._cap_index[cap].add(resource.id)
 
     async def _execute_with_resource(self, task: Task, resource: Resource) -> Dict[str, Any]:
-        pass 
+        """
+        Delegate a single task to its resource over A2A, or simulate it
+        when no protocol client is configured.
+        """
+        logger.debug("Executing task %r with resource %s", task.description, resource.name or resource.id)
+
+        if self.a2a_protocol is not None:
+            if hasattr(self.a2a_protocol, "invoke_task_batch"):
+                return await self._invoke_batched(resource.endpoint, task)
+            return await self.a2a_protocol.invoke_task(resource.endpoint, task)
+
+        if self._simulation_delay:
+            await asyncio.sleep(self._simulation_delay)
+        return {
+            "status": "simulated",
+            "resource": resource.id,
+            "output": f"Processed '{task.description}'"
+        }
+
+    async def _invoke_batched(self, endpoint: str, task: Task) -> Dict[str, Any]:
+        """
+        Queue the task for its endpoint. Tasks queued for the same endpoint
+        in the same event loop pass go out together through invoke_task_batch,
+        which batches them only for agents that advertise support.
+        """
+        future = asyncio.get_running_loop().create_future()
+        bucket = self._pending_invocations.get(endpoint)
+        if bucket is None:
+            bucket = self._pending_invocations[endpoint] = []
+            flush = asyncio.create_task(self._flush_invocations(endpoint))
+            self._flush_tasks.add(flush)
+            flush.add_done_callback(self._flush_tasks.discard)
+        bucket.append((task, future))
+        return await future
+
+    async def _flush_invocations(self, endpoint: str):
+        # this first step runs only after the subtasks already scheduled in
+        # this loop pass, so they have joined the bucket by now
+        bucket = self._pending_invocations.pop(endpoint)
+
+        tasks = [task for task, _ in bucket]
+        try:
+            if len(tasks) == 1:
+                outcomes = [await self.a2a_protocol.invoke_task(endpoint, tasks[0])]
+            else:
+                outcomes = await self.a2a_protocol.invoke_task_batch(endpoint, tasks)
+        except Exception as e:
+            for _, future in bucket:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), outcome in zip(bucket, outcomes):
+            # the waiting subtask may have been cancelled
+            if not future.done():
+                future.set_result(outcome)
 
     # ==== Reasoning Strategies ==== 
     # we need to force pre-done structured to help the llms in reflection 
@@ -133,12 +515,35 @@ class PrincipalAgent:
     async def _reasoning_tree_of_thoughts(self, task: Task):
         pass
 
+    def set_max_concurrency(self, max_concurrency: int):
+        """Change how many subtasks may run at once; applies to tasks started afterwards."""
+        self._task_sem = asyncio.Semaphore(max_concurrency)
+
+    async def aclose(self):
+        """
+        Release the protocol client. Connections live in the shared HTTP pool,
+        which is reused across endpoints and closed by shutdown_http_client().
+        """
+        if self.a2a_protocol is not None:
+            await self.a2a_protocol.disconnect()
+
     def set_operation_mode(self, mode: OperationalMode):
         pass 
     
     # might change because of a2a usage 
-    def get_execution_history(self) -> List[Dict]:
-        pass 
+    def get_execution_history(self, serialize: bool = False) -> List[Dict]:
+        """
+        Recorded executions, oldest first, with ISO timestamps.
+        With serialize=True tasks are converted to plain dicts (JSON-ready).
+        """
+        return [
+            {
+                **record,
+                "tasks": [asdict(t) for t in record["tasks"]] if serialize else list(record["tasks"]),
+                "timestamp": datetime.fromtimestamp(record["timestamp"]).isoformat()
+            }
+            for record in self.execution_history
+        ]
 
     def get_context(self) -> Dict:
         pass
\ No newline at end of file
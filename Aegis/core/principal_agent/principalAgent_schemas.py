@@ -1,7 +1,9 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional
 from enum import Enum
 
+from Aegis.core.gateway_agent.gatewayAgent_shcemas import _intern_caps
+
 
 class OperationalMode(Enum):
     NO_LLM = "no_llm"          # Deterministic workflow
@@ -10,20 +12,27 @@ class OperationalMode(Enum):
     HYBRID = "hybrid"          # Combined modes
 
 
-@dataclass 
+@dataclass(slots=True)
 class Task:
     # this can be done using the protocol A2A - future implementation 
     id: str
     description: str
     requirements: List[str]
     context: Dict[str, Any]
-    status: str = "pending" # pending, on-going, "failed"
+    status: str = "pending" # pending, on-going, completed, failed
     result: Optional[Any] = None
     # this makes sense? maybe
     assigned_resource: Optional[str] = None
 
+    def __post_init__(self):
+        if not self.id:
+            raise ValueError("Task requires a non-empty id")
+        if isinstance(self.requirements, str):
+            raise ValueError("Task requirements must be a list of capability names, not a string")
+        self.requirements = _intern_caps(self.requirements)
+
 
-@dataclass
+@dataclass(slots=True)
 class Resource:
     id: str
     name: str
@@ -32,3 +41,12 @@ class Resource:
     manifest: Dict[str, Any]
     gateway_id: str
     performance_metrics: Dict[str, float] = None
+    # set view of capabilities for O(1) membership / intersection checks
+    caps_set: frozenset = field(default=None)
+
+    def __post_init__(self):
+        if isinstance(self.capabilities, str):
+            raise ValueError("Resource capabilities must be a list of capability names, not a string")
+        self.capabilities = _intern_caps(self.capabilities)
+        if self.caps_set is None:
+            self.caps_set = frozenset(self.capabilities)
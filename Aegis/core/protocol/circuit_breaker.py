@@ -0,0 +1,58 @@
+import time
+from typing import Dict, Any, Optional
+
+
+class CircuitBreaker:
+    """
+    Per-endpoint circuit breaker.
+
+    After `fail_max` consecutive failures the circuit opens and calls are
+    rejected for `reset_timeout` seconds. Then a single trial call is let
+    through: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, fail_max: int = 5, reset_timeout: float = 30.0):
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+
+        self.consecutive_failures = 0
+        self.total_failures = 0
+        self.rejected_calls = 0
+        self._opened_at: Optional[float] = None
+
+    @property
+    def current_state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return "open"
+        return "half-open"
+
+    def allow(self) -> bool:
+        """Whether a call may go through right now."""
+        if self._opened_at is None:
+            return True
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            # half-open: re-arm so concurrent callers wait for this trial
+            self._opened_at = time.monotonic()
+            return True
+        self.rejected_calls += 1
+        return False
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self._opened_at = None
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self.total_failures += 1
+        if self.consecutive_failures >= self.fail_max:
+            self._opened_at = time.monotonic()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "state": self.current_state,
+            "consecutive_failures": self.consecutive_failures,
+            "total_failures": self.total_failures,
+            "rejected_calls": self.rejected_calls
+        }
@@ -0,0 +1,38 @@
+import logging
+from functools import lru_cache
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Shared, pooled HTTP client used by every protocol client.
+
+    Reusing a single client keeps connections alive across invocations, so
+    repeated calls to the same endpoint skip the TCP/TLS handshake. HTTP/2
+    lets concurrent requests to one peer share a single connection.
+    """
+    logger.info("Shared HTTP client created")
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=httpx.Timeout(30.0),
+        limits=httpx.Limits(
+            max_keepalive_connections=100,
+            max_connections=200,
+            keepalive_expiry=30.0
+        )
+    )
+
+
+async def shutdown_http_client():
+    """
+    Close the shared HTTP client (e.g. from a FastAPI shutdown event).
+    The next call to get_http_client() creates a fresh one.
+    """
+    if get_http_client.cache_info().currsize:
+        await get_http_client().aclose()
+        get_http_client.cache_clear()
+        logger.info("Shared HTTP client closed")
@@ -1,40 +1,105 @@
 import asyncio
+import itertools
 import logging
 import httpx
-from typing import Dict, Any, List, Optional
-from dataclasses import dataclass
+from cachetools import TTLCache
+from typing import Dict, Any, List, Optional, Set, Tuple
+from dataclasses import asdict, dataclass, is_dataclass
 import json
+import orjson
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+from Aegis.core.protocol.circuit_breaker import CircuitBreaker
+from Aegis.core.protocol.http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
 
+def _json_default(obj: Any) -> Any:
+    # orjson handles dataclasses natively; sets are the common leftover
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _stdlib_default(obj: Any) -> Any:
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return asdict(obj)
+    return _json_default(obj)
+
+
+def _dumps(payload: Any) -> bytes:
+    """
+    Encode a request body. orjson covers everything the stdlib json module
+    accepted (non-str dict keys included), except integers beyond 64 bits,
+    which fall back to json.dumps.
+    """
+    try:
+        return orjson.dumps(payload, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    except orjson.JSONEncodeError:
+        return json.dumps(payload, default=_stdlib_default).encode()
+
+
+@dataclass(slots=True)
+class _InvokeTask:
+    # wire shape of params.task in agent.invoke; orjson encodes it without an intermediate dict
+    description: str
+    context: Dict[str, Any]
+    requester_id: str
+
+
+class _BatchRejected(Exception):
+    # an agent answered a JSON-RPC batch POST with an HTTP error status
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
 # ============================================================================
 # A2A PROTOCOL CLIENT 
 # ============================================================================
 class A2AProtocolClient:
 
-    def __init__(self, client_id: str = None):
+    INVOKE_HEADERS = {"Content-Type": "application/json"}
+    DISCOVER_HEADERS = {"Accept": "application/json"}
+
+    AGENT_CARD_CACHE_SIZE = 500
+    AGENT_CARD_TTL = 60.0
+
+    # max agent-card fetches in flight during discover_agents()
+    DISCOVERY_CONCURRENCY = 32
+
+    def __init__(self, client_id: str = None, session: Optional[httpx.AsyncClient] = None):
         self.client_id = client_id or f"principal-agent-{id(self)}"
-        self.session = None
-        self._connected_agents: Dict[str, Dict] = {}
+        # pooled client shared with every other protocol client
+        self.session = session or get_http_client()
+        self._invoke_headers = {**self.INVOKE_HEADERS, "X-A2A-Client-ID": self.client_id}
+
+        # JSON-RPC request ids: fixed prefix + monotonic counter
+        self._id_prefix = f"req_{self.client_id}_"
+        self._request_counter = itertools.count()
+        # agent cards by endpoint, refetched once they expire
+        self._connected_agents: TTLCache = TTLCache(maxsize=self.AGENT_CARD_CACHE_SIZE, ttl=self.AGENT_CARD_TTL)
+
+        # one breaker per endpoint so dead agents fail fast
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        # endpoints that answered a JSON-RPC batch with a single error
+        self._batch_unsupported: Set[str] = set()
 
-        logger.info(f"A2A Protocol Client initialized: {self.client_id}")
+        logger.info("A2A Protocol Client initialized: %s", self.client_id)
 
 
     async def connect(self) -> bool:
         """Initialize A2A client connection"""
         try:
-            
-            self.session = httpx.AsyncClient(
-                timeout=httpx.Timeout(30.0),
-                limits=httpx.Limits(max_keepalive_connections=10)
-            )
+            if self.session is None or self.session.is_closed:
+                self.session = get_http_client()
             logger.info("A2A client connected")
 
             return True
         
         except Exception as e:
-            logger.error(f"Failed to connect A2A client: {e}")
+            logger.error("Failed to connect A2A client: %s", e)
             return False
         
     async def invoke_agent(
@@ -42,51 +107,181 @@ class A2AProtocolClient:
             endpoint: str, 
             task_desc: str, 
             context: Dict[str, Any]) -> Dict[str, Any]:
-        
 
+        # Current implementation using A2A protocol structure - can be replaced for the oficial sdk later 
+        params = {"task": _InvokeTask(task_desc, context, self.client_id)}
+        return await self._send_invoke(endpoint, params, task_desc)
+
+    async def invoke_task(self, endpoint: str, task: Any) -> Dict[str, Any]:
+        """
+        Invoke an agent with a task object (e.g. principal_agent Task).
+
+        Only the task's description and context are sent, in the same
+        payload shape as invoke_agent.
+        """
+        return await self.invoke_agent(endpoint, task.description, task.context)
+
+    async def _send_invoke(self, endpoint: str, params: Dict[str, Any], task_desc: str) -> Dict[str, Any]:
+        logger.debug("A2A: Invoking agent at %s for task: %r", endpoint, task_desc)
+
+        result, error = await self._send(endpoint, self._invoke_request(params))
+        if error is not None:
+            return error
+        return self._parse_reply(result)
+
+    async def invoke_task_batch(self, endpoint: str, tasks: List[Any]) -> List[Dict[str, Any]]:
+        """
+        Invoke one agent with several tasks in a single JSON-RPC batch
+        request, saving a round trip per task.
+
+        Batches are opt-in: only agents whose (discovered) agent card sets
+        "supports_batch" get them. Everyone else, and agents that reject a
+        batch anyway, get the tasks one by one and are not sent batches again.
+
+        Returns:
+            One result per task, in the same order
+        """
+        agent_card = self._connected_agents.get(endpoint)
+        if endpoint in self._batch_unsupported or not (agent_card and agent_card.get("supports_batch")):
+            return await self._invoke_each(endpoint, tasks)
+
+        logger.info("A2A: Invoking agent at %s with a batch of %d tasks", endpoint, len(tasks))
+
+        requests = [
+            self._invoke_request({"task": _InvokeTask(task.description, task.context, self.client_id)})
+            for task in tasks
+        ]
         try:
-            logger.info(f"A2A: Invoking agent at {endpoint} for task: '{task_desc}'")
+            replies, error = await self._send(endpoint, requests, batch=True)
+        except _BatchRejected as e:
+            self._batch_unsupported.add(endpoint)
+            if e.status_code < 500:
+                # refused outright (e.g. 422 from a handler expecting one object): nothing ran
+                logger.warning("A2A: Agent at %s rejected a batch request (HTTP %s), sending tasks one by one",
+                               endpoint, e.status_code)
+                return await self._invoke_each(endpoint, tasks)
+            # some tasks may have run before the server error, so they are not re-sent
+            logger.error("A2A: Batch request to %s failed with HTTP %s", endpoint, e.status_code)
+            return [{"error": f"HTTP {e.status_code}"} for _ in tasks]
+        if error is not None:
+            return [dict(error) for _ in tasks]
 
-            # Current implementation using A2A protocol structure - can be replaced for the oficial sdk later 
-            request_payload = {
-                    "jsonrpc": "2.0",
-                    "method": "agent.invoke",
-                    "params": {
-                        "task": {
-                            "description": task_desc,
-                            "context": context,
-                            "requester_id": self.client_id
-                        }
-                    },
-                    "id": f"req_{id(self)}_{asyncio.get_event_loop().time()}"
-            }
+        if isinstance(replies, dict):
+            # a single error object: the agent rejected the batch without running it
+            logger.warning("A2A: Agent at %s rejected a batch request (%s), sending tasks one by one",
+                           endpoint, replies.get("error"))
+            self._batch_unsupported.add(endpoint)
+            return await self._invoke_each(endpoint, tasks)
 
-            response = await self.session.post(
-                    f"{endpoint}/a2a/invoke",
-                    json=request_payload,
+        if not isinstance(replies, list):
+            logger.error("A2A: Invalid batch response from %s", endpoint)
+            return [{"error": "Invalid batch response"} for _ in tasks]
 
-                    headers={
-                        "Content-Type": "application/json",
-                        "X-A2A-Client-ID": self.client_id
-                    }
-            )
+        by_id = {reply.get("id"): reply for reply in replies if isinstance(reply, dict)}
+        return [
+            self._parse_reply(by_id[request["id"]]) if request["id"] in by_id
+            else {"error": "No response for request"}
+            for request in requests
+        ]
+
+    async def _invoke_each(self, endpoint: str, tasks: List[Any]) -> List[Dict[str, Any]]:
+        return list(await asyncio.gather(*[self.invoke_task(endpoint, task) for task in tasks]))
+
+    def _parse_reply(self, reply: Any) -> Dict[str, Any]:
+        """Result of one JSON-RPC response object, or an error dict."""
+        if not isinstance(reply, dict):
+            logger.error("A2A: Invalid response object: %r", reply)
+            return {"error": "Invalid response"}
+
+        if "error" in reply:
+            logger.error("A2A invocation error: %s", reply["error"])
+            return {"error": reply["error"]}
+
+        return reply.get("result", {})
+
+    def _invoke_request(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "jsonrpc": "2.0",
+            "method": "agent.invoke",
+            "params": params,
+            "id": f"{self._id_prefix}{next(self._request_counter)}"
+        }
+
+    async def _send(self, endpoint: str, payload: Any, batch: bool = False) -> Tuple[Any, Optional[Dict[str, Any]]]:
+        """
+        POST a JSON-RPC payload (single request or batch) to the agent,
+        going through its circuit breaker.
+
+        Returns:
+            (decoded response, None) on success, (None, error dict) otherwise
+
+        Raises:
+            _BatchRejected: a batch POST got an HTTP error status
+        """
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            breaker = self._breakers[endpoint] = CircuitBreaker()
+
+        try:
+            content = _dumps(payload)
+        except (TypeError, ValueError) as e:
+            # nothing was sent, so the agent's health is unknown: leave the breaker alone
+            logger.error("Failed to encode request for %s: %s", endpoint, e)
+            return None, {"error": str(e)}
+
+        if not breaker.allow():
+            logger.warning("A2A: Circuit open for %s, skipping invocation", endpoint)
+            return None, {"error": f"Circuit open for {endpoint}"}
+
+        try:
+            response = await self._post(f"{endpoint}/a2a/invoke", content)
 
             response.raise_for_status()
-            result = response.json()
+            breaker.record_success()
+            return orjson.loads(response.content), None
 
-            if "error" in result:
-                logger.error(f"A2A invocation error: {result['error']}")
-                return {"error": result["error"]}
-            
-            return result.get("result", {})
-        
         except httpx.HTTPStatusError as e:
-                logger.error(f"HTTP error invoking agent: {e.response.status_code}")
-                return {"error": f"HTTP {e.response.status_code}"}
+                if batch:
+                    # the array body may be what the agent chokes on; it answered, so it is up
+                    breaker.record_success()
+                    raise _BatchRejected(e.response.status_code) from e
+                logger.error("HTTP error invoking agent: %s", e.response.status_code)
+                # only server errors mean the agent is unhealthy
+                if e.response.status_code >= 500:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                # the cached agent card may be stale
+                self._connected_agents.pop(endpoint, None)
+                return None, {"error": f"HTTP {e.response.status_code}"}
+
+        except httpx.TransportError as e:
+            # retries exhausted
+            breaker.record_failure()
+            logger.error("Failed to invoke agent at %s: %s", endpoint, e)
+            return None, {"error": str(e)}
         
         except Exception as e:
-            logger.error(f"Failed to invoke agent at {endpoint}: {e}")
-            return {"error": str(e)}
+            # e.g. an undecodable reply; still settle the call so a half-open trial is not left hanging
+            breaker.record_failure()
+            logger.error("Failed to invoke agent at %s: %s", endpoint, e)
+            return None, {"error": str(e)}
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=0.1, max=2.0),
+        retry=retry_if_exception_type((httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)),
+        reraise=True
+    )
+    async def _post(self, url: str, content: bytes) -> httpx.Response:
+        # agent.invoke is not idempotent: only failures before the request was
+        # sent are retried (with exponential backoff); read errors/timeouts are not,
+        # since the agent may already be running the task
+        return await self.session.post(url, content=content, headers=self._invoke_headers)
+
+    def get_breaker_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Circuit breaker state and counters per endpoint"""
+        return {endpoint: breaker.get_metrics() for endpoint, breaker in self._breakers.items()}
     
     async def discover_agent(self, endpoint: str):
         """
@@ -98,57 +293,90 @@ class A2AProtocolClient:
         Returns:
             Agent card with capabilities
         """
+        agent_card = self._connected_agents.get(endpoint)
+        if agent_card is not None:
+            return agent_card
+
         try:
             
             # For now, using HTTP with A2A protocol structure
             response = await self.session.get(
                
                 f"{endpoint}/a2a/agent-card",
-                headers={"Accept": "application/json"}
+                headers=self.DISCOVER_HEADERS
             )
             
             if response.status_code == 200:
-                agent_card = response.json()
+                agent_card = orjson.loads(response.content)
                 self._connected_agents[endpoint] = agent_card
-                logger.info(f"Discovered agent at {endpoint}: {agent_card.get('name')}")
+                logger.info("Discovered agent at %s: %s", endpoint, agent_card.get("name"))
                 return agent_card
             else:
-                logger.warning(f"Failed to discover agent at {endpoint}: {response.status_code}")
+                logger.warning("Failed to discover agent at %s: %s", endpoint, response.status_code)
                 return None
                 
         except Exception as e:
-            logger.error(f"Error discovering agent at {endpoint}: {e}")
+            logger.error("Error discovering agent at %s: %s", endpoint, e)
             return None
 
+    async def discover_agents(self, endpoints: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Discover many agents concurrently, with at most DISCOVERY_CONCURRENCY
+        requests in flight so the shared connection pool is not swamped.
+
+        Returns:
+            Agent card (or None) per endpoint
+        """
+        semaphore = asyncio.Semaphore(self.DISCOVERY_CONCURRENCY)
+
+        async def _discover_one(endpoint: str):
+            async with semaphore:
+                try:
+                    return endpoint, await self.discover_agent(endpoint)
+                except Exception as e:
+                    # keep one bad endpoint from cancelling the rest of the group
+                    logger.error("Error discovering agent at %s: %s", endpoint, e)
+                    return endpoint, None
+
+        async with asyncio.TaskGroup() as group:
+            tasks = [group.create_task(_discover_one(endpoint)) for endpoint in endpoints]
+
+        return dict(task.result() for task in tasks)
+
     async def disconnect(self):
-        """Disconnect A2A client"""
-        if self.session:
-            await self.session.aclose()
+        """
+        Disconnect A2A client.
+        The pooled session is shared, so it is closed by shutdown_http_client().
+        """
         logger.info("A2A client disconnected")
 
 
 class MCPClient:
 
-    def __init__(self, client_name: str = None):
+    TIMEOUT = httpx.Timeout(10.0)
+    HEADERS = {"Content-Type": "application/json"}
+
+    def __init__(self, client_name: str = None, session: Optional[httpx.AsyncClient] = None):
         self.client_name = client_name or f"mcp-client-{id(self)}"
-        self.session = None
+        # pooled client shared with every other protocol client
+        self.session = session or get_http_client()
         self._discovered_tools: Dict[str, List[Dict]] = {}
-        
+
+        # JSON-RPC request ids: fixed prefix + monotonic counter
+        self._id_prefix = f"tool_{self.client_name}_"
+        self._request_counter = itertools.count()
        
-        logger.info(f"MCP Client initialized: {self.client_name}")
+        logger.info("MCP Client initialized: %s", self.client_name)
 
     async def connect(self) -> bool:
         try:     
-            
-            self.session = httpx.AsyncClient(
-                timeout=httpx.Timeout(10.0),
-                limits=httpx.Limits(max_keepalive_connections=20)
-            )
+            if self.session is None or self.session.is_closed:
+                self.session = get_http_client()
             logger.info("MCP client connected")
             return True
         
         except Exception as e:
-            logger.error(f"Failed to connect MCP client: {e}")
+            logger.error("Failed to connect MCP client: %s", e)
             return False
         
     async def list_tools(self, endpoint: str) -> List[Dict[str, Any]]:
@@ -165,25 +393,27 @@ class MCPClient:
                       
             response = await self.session.post(
                 f"{endpoint}/mcp/list",
-                json={
+                content=_dumps({
                     "jsonrpc": "2.0",
                     "method": "tools/list",
                     "id": 1
-                }
+                }),
+                headers=self.HEADERS,
+                timeout=self.TIMEOUT
             )
             
             if response.status_code == 200:
-                result = response.json()
+                result = orjson.loads(response.content)
                 tools = result.get("result", {}).get("tools", [])
                 self._discovered_tools[endpoint] = tools
-                logger.info(f"Discovered {len(tools)} tools at {endpoint}")
+                logger.info("Discovered %d tools at %s", len(tools), endpoint)
                 return tools
             else:
-                logger.warning(f"Failed to list tools at {endpoint}")
+                logger.warning("Failed to list tools at %s", endpoint)
                 return []
                 
         except Exception as e:
-            logger.error(f"Error listing tools at {endpoint}: {e}")
+            logger.error("Error listing tools at %s: %s", endpoint, e)
             return []
     
     async def invoke_tool(
@@ -192,7 +422,7 @@ class MCPClient:
             tool_name: str=None,
             params: Dict[str, Any] = None) -> Dict[str,Any]:
         
-        logger.info(f"MCP: Invoking tool{f' {tool_name}' if tool_name else ''} at {endpoint}")
+        logger.debug("MCP: Invoking tool %s at %s", tool_name or "default", endpoint)
         try:
             if "/mcp" in endpoint:
      
@@ -203,45 +433,50 @@ class MCPClient:
                         "name": tool_name or "default",
                         "arguments": params or {}
                     },
-                    "id": f"tool_{id(self)}_{asyncio.get_event_loop().time()}"
+                    "id": f"{self._id_prefix}{next(self._request_counter)}"
                 }
                 
                 response = await self.session.post(
                     endpoint if "/mcp" in endpoint else f"{endpoint}/mcp/call",
-                    json=request_payload
+                    content=_dumps(request_payload),
+                    headers=self.HEADERS,
+                    timeout=self.TIMEOUT
                 )
 
             else:
                 # Simple REST API
                 response = await self.session.post(
                     endpoint,
-                    json=params or {}
+                    content=_dumps(params or {}),
+                    headers=self.HEADERS,
+                    timeout=self.TIMEOUT
                 )
             
             response.raise_for_status()
-            result = response.json()
+            result = orjson.loads(response.content)
             
             
             if "result" in result:
                 return result["result"]
             
             elif "error" in result:
-                logger.error(f"MCP tool error: {result['error']}")
+                logger.error("MCP tool error: %s", result["error"])
                 return {"error": result["error"]}
             else:
                 return result
             
         except httpx.HTTPStatusError as e:
-            logger.error(f"HTTP error invoking tool: {e.response.status_code}")
+            logger.error("HTTP error invoking tool: %s", e.response.status_code)
             return {"error": f"HTTP {e.response.status_code}"}
         except Exception as e:
-            logger.error(f"Failed to invoke tool at {endpoint}: {e}")
+            logger.error("Failed to invoke tool at %s: %s", endpoint, e)
             return {"error": str(e)}
 
     async def disconnect(self):
-        """Disconnect MCP client"""
-        if self.session:
-            await self.session.aclose()
+        """
+        Disconnect MCP client.
+        The pooled session is shared, so it is closed by shutdown_http_client().
+        """
         logger.info("MCP client disconnected")
 
 
@@ -251,21 +486,40 @@ class UnifiedProtocolClient:
     Unified client that automatically selects the appropriate protocol.
     Provides a single interface for both A2A and MCP communication.
     """
-    def __init__(self):
-        self.a2a_client = A2AProtocolClient()
-        self.mcp_client = MCPClient()
-        self._connected = False
+    def __init__(self, session: Optional[httpx.AsyncClient] = None):
+        # both protocols ride the same connection pool
+        session = session or get_http_client()
+        self.a2a_client = A2AProtocolClient(session=session)
+        self.mcp_client = MCPClient(session=session)
+
+        # resource type -> protocol handler
+        self._dispatch = {
+            "agent": self._invoke_agent,
+            "tool": self._invoke_tool
+        }
+
+        # set once connected; a single in-flight connect is shared by concurrent callers
+        self._connected = asyncio.Event()
+        self._connect_task: Optional[asyncio.Future] = None
 
     async def connect(self) -> bool:
         """Connect both protocol clients"""
         try:
             a2a_connected = await self.a2a_client.connect()
             mcp_connected = await self.mcp_client.connect()
-            self._connected = a2a_connected and mcp_connected
-            return self._connected
+            if a2a_connected and mcp_connected:
+                self._connected.set()
+            else:
+                self._connected.clear()
+            return self._connected.is_set()
         except Exception as e:
-            logger.error(f"Failed to connect unified client: {e}")
+            logger.error("Failed to connect unified client: %s", e)
             return False
+
+    async def _ensure_connected(self):
+        if self._connect_task is None or self._connect_task.done():
+            self._connect_task = asyncio.ensure_future(self.connect())
+        await self._connect_task
         
     async def invoke(self, 
                     endpoint: str,
@@ -284,25 +538,31 @@ class UnifiedProtocolClient:
         Returns:
             Execution result
         """
-        if not self._connected:
-            await self.connect()
-        
-        if resource_type == "agent":
-            # Use A2A for agent communication
-            return await self.a2a_client.invoke_agent(
-                endpoint=endpoint,
-                task_desc=task_desc or "Execute task",
-                context=params or {}
-            )
-        elif resource_type == "tool":
-            # Use MCP for tool invocation
-            return await self.mcp_client.invoke_tool(
-                endpoint=endpoint,
-                params=params
-            )
-        else:
-            logger.error(f"Unknown resource type: {resource_type}")
-            return {"error": f"Unknown resource type: {resource_type}"}   
+        if not self._connected.is_set():
+            await self._ensure_connected()
+
+        try:
+            handler = self._dispatch[resource_type]
+        except KeyError:
+            logger.error("Unknown resource type: %s", resource_type)
+            return {"error": f"Unknown resource type: {resource_type}"}
+
+        return await handler(endpoint, task_desc, params)
+
+    async def _invoke_agent(self, endpoint: str, task_desc: Optional[str], params: Optional[Dict[str, Any]]):
+        # Use A2A for agent communication
+        return await self.a2a_client.invoke_agent(
+            endpoint=endpoint,
+            task_desc=task_desc or "Execute task",
+            context=params or {}
+        )
+
+    async def _invoke_tool(self, endpoint: str, task_desc: Optional[str], params: Optional[Dict[str, Any]]):
+        # Use MCP for tool invocation
+        return await self.mcp_client.invoke_tool(
+            endpoint=endpoint,
+            params=params
+        )
 
 def create_protocol_client(protocol_type: str = "unified") -> Any:
     """
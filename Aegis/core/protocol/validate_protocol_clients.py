@@ -5,16 +5,36 @@ Tests basic protocol client functionality without external dependencies
 """
 
 import asyncio
+import json
 import sys
 import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from collections import namedtuple
 
-from protocol_clients import (
+import httpx
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from Aegis.core.principal_agent.principalAgent import PrincipalAgent
+from Aegis.core.protocol.circuit_breaker import CircuitBreaker
+from Aegis.core.protocol.protocol_clients import (
     A2AProtocolClient,
     MCPClient,
     UnifiedProtocolClient
 )
 
+# anything with a description and a context can be invoked as a task
+ValidationTask = namedtuple("ValidationTask", ["description", "context"])
+
+
+def mock_session(handler) -> httpx.AsyncClient:
+    """Session whose requests are answered by handler(request) instead of the network"""
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def echo_reply(body: dict) -> httpx.Response:
+    return httpx.Response(200, json={"jsonrpc": "2.0", "id": body["id"], "result": body["params"]["task"]["description"]})
+
+
 async def validate_clients():
     """Validate that protocol clients can be instantiated and configured"""
     
@@ -100,6 +120,137 @@ async def validate_clients():
         print(f"   ❌ Failed: {e}")
         results.append(("Protocol Selection", "❌ FAIL"))
     
+    # Test 6: Batches are opt-in and rejected batches fall back to single calls
+    print("\n 6 Checking batch rejection fallback...")
+    try:
+        bodies = []
+
+        def reject_batches(request):
+            body = json.loads(request.content)
+            bodies.append("batch" if isinstance(body, list) else "single")
+            return httpx.Response(422) if isinstance(body, list) else echo_reply(body)
+
+        client = A2AProtocolClient(client_id="validation-batch", session=mock_session(reject_batches))
+        tasks = [ValidationTask("first", {}), ValidationTask("second", {})]
+
+        # agent card does not advertise batches: no array is ever sent
+        assert await client.invoke_task_batch("http://plain", tasks) == ["first", "second"]
+        assert bodies == ["single", "single"], bodies
+
+        # advertised but refused with a 4xx: re-sent one by one, then never batched again
+        bodies.clear()
+        client._connected_agents["http://agent"] = {"name": "agent", "supports_batch": True}
+        assert await client.invoke_task_batch("http://agent", tasks) == ["first", "second"]
+        assert await client.invoke_task_batch("http://agent", tasks) == ["first", "second"]
+        assert bodies == ["batch", "single", "single", "single", "single"], bodies
+        assert client.get_breaker_metrics()["http://agent"]["total_failures"] == 0
+        print("   ✅ Rejected batch re-sent as single invocations")
+        results.append(("Batch Fallback", "✅ PASS"))
+    except AssertionError as e:
+        print(f"   ❌ Failed: {e}")
+        results.append(("Batch Fallback", "❌ FAIL"))
+
+    # Test 7: Circuit breaker opens, lets one trial through, then closes
+    print("\n 7 Checking circuit breaker recovery...")
+    try:
+        healthy = False
+
+        def flaky(request):
+            return echo_reply(json.loads(request.content)) if healthy else httpx.Response(503)
+
+        client = A2AProtocolClient(client_id="validation-breaker", session=mock_session(flaky))
+        breaker = client._breakers["http://agent"] = CircuitBreaker(fail_max=2, reset_timeout=0.05)
+
+        await client.invoke_agent("http://agent", "first", {})
+        await client.invoke_agent("http://agent", "second", {})
+        assert breaker.current_state == "open", breaker.current_state
+        assert await client.invoke_agent("http://agent", "third", {}) == {"error": "Circuit open for http://agent"}
+
+        await asyncio.sleep(0.06)
+        assert breaker.current_state == "half-open", breaker.current_state
+        healthy = True
+        assert await client.invoke_agent("http://agent", "trial", {}) == "trial"
+        assert breaker.get_metrics() == {
+            "state": "closed", "consecutive_failures": 0, "total_failures": 2, "rejected_calls": 1
+        }, breaker.get_metrics()
+        print("   ✅ Breaker went open → half-open → closed")
+        results.append(("Circuit Breaker", "✅ PASS"))
+    except AssertionError as e:
+        print(f"   ❌ Failed: {e}")
+        results.append(("Circuit Breaker", "❌ FAIL"))
+
+    # Test 8: Only connection errors are retried; a read timeout may have run the task
+    print("\n 8 Checking retry policy...")
+    try:
+        calls = []
+
+        def slow(request):
+            calls.append(request)
+            raise httpx.ReadTimeout("timed out", request=request)
+
+        client = A2AProtocolClient(client_id="validation-retry", session=mock_session(slow))
+        result = await client.invoke_agent("http://agent", "slow task", {})
+        assert "error" in result, result
+        assert len(calls) == 1, f"{len(calls)} attempts"
+        assert client.get_breaker_metrics()["http://agent"]["total_failures"] == 1
+
+        calls.clear()
+
+        def refused(request):
+            calls.append(request)
+            raise httpx.ConnectError("refused", request=request)
+
+        client = A2AProtocolClient(client_id="validation-retry", session=mock_session(refused))
+        await client.invoke_agent("http://agent", "unreachable", {})
+        assert len(calls) == 3, f"{len(calls)} attempts"
+        print("   ✅ ReadTimeout sent once, ConnectError retried")
+        results.append(("Retry Policy", "✅ PASS"))
+    except AssertionError as e:
+        print(f"   ❌ Failed: {e}")
+        results.append(("Retry Policy", "❌ FAIL"))
+
+    # Test 9: A half-open trial that fails unexpectedly is still recorded
+    print("\n 9 Checking half-open trial with an unexpected error...")
+    try:
+        def garbage(request):
+            return httpx.Response(200, content=b"not json")
+
+        client = A2AProtocolClient(client_id="validation-trial", session=mock_session(garbage))
+        breaker = client._breakers["http://agent"] = CircuitBreaker(fail_max=1, reset_timeout=0.05)
+        breaker.record_failure()
+        await asyncio.sleep(0.06)
+
+        result = await client.invoke_agent("http://agent", "trial", {})
+        assert "error" in result, result
+        assert breaker.total_failures == 2, breaker.get_metrics()
+
+        # a payload that cannot be encoded never reaches the agent nor spends the trial
+        await asyncio.sleep(0.06)
+        result = await client.invoke_agent("http://agent", "unencodable", {"value": object()})
+        assert "error" in result, result
+        assert breaker.current_state == "half-open", breaker.current_state
+        assert breaker.total_failures == 2, breaker.get_metrics()
+        print("   ✅ Failed trial recorded, encoding errors leave the breaker alone")
+        results.append(("Half-open Trial", "✅ PASS"))
+    except AssertionError as e:
+        print(f"   ❌ Failed: {e}")
+        results.append(("Half-open Trial", "❌ FAIL"))
+
+    # Test 10: A request only dequeues the tasks it planned itself
+    print("\n10 Checking principal task queue isolation...")
+    try:
+        principal = PrincipalAgent(name="validation-principal")
+        await principal.plan_task("calculate 2+2")
+        outcome = await principal.execute_task("search the docs")
+        assert [r["description"] for r in outcome["results"]] == ["Search for information"], outcome["results"]
+        queued = [entry[-1].description for entry in principal.task_queue]
+        assert queued == ["Perform arithmetic calculation"], queued
+        print("   ✅ Tasks planned elsewhere stay queued")
+        results.append(("Task Queue", "✅ PASS"))
+    except AssertionError as e:
+        print(f"   ❌ Failed: {e}")
+        results.append(("Task Queue", "❌ FAIL"))
+
     # Summary
     print("\n" + "="*10)
     print(" VALIDATION SUMMARY")